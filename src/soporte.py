@@ -1,12 +1,18 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 from IPython.display import display
 from pathlib import Path
-import unicodedata
+from collections import Counter, OrderedDict
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import charset_normalizer
 
 
     
-def cargar_df_list_desde_directorio_csv(dir_path, patron="*.csv", imprimir_info=True, devolver_detalle=False):
+def cargar_df_list_desde_directorio_csv(dir_path, patron="*.csv", imprimir_info=True, devolver_detalle=False, concatenar=False):
     """
     Busca CSVs en un directorio, intenta leer cada archivo con cargar_todos_csv
     y devuelve una lista de DataFrames.
@@ -16,11 +22,16 @@ def cargar_df_list_desde_directorio_csv(dir_path, patron="*.csv", imprimir_info=
         patron (str): Patrón de búsqueda (por defecto "*.csv").
         imprimir_info (bool): Si True, imprime resumen de archivos encontrados.
         devolver_detalle (bool): Si True, devuelve también rutas, encodings y separadores.
+        concatenar (bool): Si True, devuelve un único DataFrame con todos los
+            archivos ya concatenados vía pyarrow (esquemas unificados, los
+            campos que faltan quedan como nulos). Tiene prioridad sobre
+            devolver_detalle y ahorra el pd.concat posterior y su copia.
 
     Returns:
-        list[pd.DataFrame] | tuple: 
+        list[pd.DataFrame] | pd.DataFrame | tuple:
             - Si devolver_detalle=False: lista de DataFrames
             - Si devolver_detalle=True: (df_list, paths, encodings, separadores)
+            - Si concatenar=True: un único DataFrame
     """
     base = Path(dir_path)
     csv_paths = list(base.glob(patron))
@@ -35,17 +46,41 @@ def cargar_df_list_desde_directorio_csv(dir_path, patron="*.csv", imprimir_info=
             f"No se encontraron CSV en {base.resolve()} con patrón '{patron}'. ¿Ruta correcta?"
         )
 
-    df_list = []
-    paths = []
-    encs = []
-    seps = []
-
-    for path in csv_paths:
-        df, enc, sep = cargar_todos_csv(path)
-        df_list.append(df)
-        paths.append(path)
-        encs.append(enc)
-        seps.append(sep)
+    if concatenar:
+        tablas = []
+        for path in csv_paths:
+            tabla = None
+            dialecto = detectar_dialecto_csv(path)
+            if dialecto is not None:
+                enc, sep = dialecto
+                try:
+                    tabla = pa_csv.read_csv(
+                        path,
+                        read_options=pa_csv.ReadOptions(encoding=enc),
+                        parse_options=pa_csv.ParseOptions(delimiter=sep),
+                    )
+                    print(f"[OK] {path.name}: encoding={enc}, sep='{sep}', shape={tabla.shape}")
+                except Exception:
+                    tabla = None
+            if tabla is None:
+                # respaldo: lectura con pandas y conversión a tabla Arrow
+                df, _, _ = cargar_todos_csv(path)
+                tabla = pa.Table.from_pandas(df, preserve_index=False)
+            tablas.append(tabla)
+
+        # concat a nivel Arrow: unifica esquemas sin la copia de pd.concat
+        combinada = pa.concat_tables(tablas, promote_options='permissive')
+        return combinada.to_pandas(types_mapper=pd.ArrowDtype)
+
+    # pd.read_csv libera el GIL durante el parseo, así que con hilos las
+    # lecturas de varios archivos se solapan. executor.map conserva el orden.
+    with ThreadPoolExecutor(max_workers=min(8, len(csv_paths))) as executor:
+        resultados = list(executor.map(cargar_todos_csv, csv_paths))
+
+    df_list = [df for df, _, _ in resultados]
+    paths = csv_paths
+    encs = [enc for _, enc, _ in resultados]
+    seps = [sep for _, _, sep in resultados]
 
     if devolver_detalle:
         return df_list, paths, encs, seps
@@ -54,12 +89,114 @@ def cargar_df_list_desde_directorio_csv(dir_path, patron="*.csv", imprimir_info=
 
 
 
+def detectar_dialecto_csv(path, tam_muestra=65536):
+    """
+    Detecta encoding y separador de un CSV leyendo solo una muestra inicial.
+
+    Primero mira el BOM; si no hay, estima el encoding con charset_normalizer
+    sobre la muestra. El separador se elige contando candidatos por línea y
+    quedándose con el que aparece de forma más consistente.
+
+    Returns:
+        tuple(str, str) | None: (encoding, sep), o None si no se puede decidir.
+    """
+    with open(path, "rb") as f:
+        muestra = f.read(tam_muestra)
+
+    if not muestra:
+        return None
+
+    # BOMs conocidos primero: son inequívocos y gratis de comprobar
+    if muestra[:3] == b"\xef\xbb\xbf":
+        enc = "utf-8-sig"
+    elif muestra[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        enc = "utf-16"
+    else:
+        mejor = charset_normalizer.from_bytes(muestra).best()
+        if mejor is None:
+            return None
+        enc = mejor.encoding
+        if enc == "ascii":
+            # La muestra puede ser ascii puro aunque el resto del archivo no;
+            # utf-8 es superconjunto estricto de ascii
+            enc = "utf-8"
+
+    texto = muestra.decode(enc, errors="ignore")
+    lineas = texto.splitlines()
+    if len(lineas) > 1:
+        lineas = lineas[:-1]  # descartar la última línea, posiblemente cortada
+    if not lineas:
+        return None
+
+    mejor_sep = None
+    mejor_puntuacion = 0
+
+    for sep in (",", ";", "|", "\t"):
+        conteo_cabecera = lineas[0].count(sep)
+        if conteo_cabecera == 0:
+            continue
+        # cuántas líneas tienen el mismo número de separadores que la cabecera
+        puntuacion = sum(linea.count(sep) == conteo_cabecera for linea in lineas)
+        if puntuacion > mejor_puntuacion:
+            mejor_puntuacion = puntuacion
+            mejor_sep = sep
+
+    if mejor_sep is None:
+        return None
+
+    return enc, mejor_sep
+
+
+def compactar_columnas_texto(df, umbral=0.5):
+    """
+    Convierte a 'category' las columnas de texto con muchos valores repetidos
+    (únicos/filas < umbral).
+
+    Los CSV de retail están llenos de columnas así (tienda, región, categoría
+    de SKU); como category ocupan una fracción de la memoria y los
+    value_counts/groupby posteriores tocan muchos menos bytes.
+
+    Returns:
+        pd.DataFrame: el mismo DataFrame, con las columnas convertidas in-place.
+    """
+    n = len(df)
+    if n == 0:
+        return df
+
+    for col in df.columns:
+        s = df[col]
+        if s.dtype == object or isinstance(s.dtype, pd.StringDtype):
+            if s.nunique(dropna=False) < umbral * n:
+                df[col] = s.astype('category')
+
+    return df
+
+
 def cargar_todos_csv(path):
     """
-    Intenta leer un CSV probando varios separadores y encodings.
+    Lee un CSV detectando encoding y separador sobre una muestra inicial,
+    de forma que el archivo se parsea una sola vez. Si la detección falla,
+    prueba varias combinaciones de separadores y encodings como respaldo.
     Devuelve (df, encoding, sep). Lanza ValueError si no puede leer.
     """
 
+    dialecto = detectar_dialecto_csv(path)
+
+    if dialecto is not None:
+        enc, sep = dialecto
+        try:
+            try:
+                # engine='pyarrow' tokeniza por bloques en todos los núcleos
+                df = pd.read_csv(path, encoding=enc, sep=sep, engine="pyarrow")
+            except Exception:
+                # pyarrow no soporta todos los encodings (p.ej. utf-16)
+                df = pd.read_csv(path, encoding=enc, sep=sep)
+            if df.shape[1] > 1:
+                print(f"[OK] {path.name}: encoding={enc}, sep='{sep}', shape={df.shape}")
+                return compactar_columnas_texto(df), enc, sep
+        except Exception:
+            pass  # caemos al barrido completo de abajo
+
     archivo = []
 
     for enc in ("utf-8-sig", "utf-8", "latin-1", "utf-16"):
@@ -71,7 +208,7 @@ def cargar_todos_csv(path):
                 
                 if df.shape[1] > 1: # al menos 2 columnas
                     print(f"[OK] {path.name}: encoding={enc}, sep='{sep}', shape={df.shape}")
-                    return df, enc, sep 
+                    return compactar_columnas_texto(df), enc, sep
                 else:
                     archivo.append((enc, sep, "solo 1 columna"))
             except Exception as e:
@@ -88,16 +225,18 @@ def cargar_todos_csv(path):
 
 
 
+# Tabla de sustituciones de un solo carácter, aplicadas en una pasada
+_TRANS_COLUMNAS = str.maketrans({" ": "_", "-": "_"})
+
+
 def normalizar_nombres_columnas(name: str) -> str:
     """
     Normaliza el nombre de una columna.
     """
-    name = name.strip()
-    name = name.lower()
-    name = name.replace(" ", "_")
-    name = name.replace("%", "pct")
-    name = name.replace("-", "_")
-    return name
+    name = name.strip().lower()
+    if "%" in name:  # único reemplazo multi-carácter
+        name = name.replace("%", "pct")
+    return name.translate(_TRANS_COLUMNAS)
 
 
 def normalizar_columnas_df_list(df_list, mostrar_cambios=True):
@@ -115,7 +254,9 @@ def normalizar_columnas_df_list(df_list, mostrar_cambios=True):
 
     for i, df in enumerate(df_list):
         old_cols = list(df.columns)
-        d2 = df.rename(columns=lambda c: normalizar_nombres_columnas(str(c)))
+        # Mapping calculado una sola vez en vez de un callable por columna
+        mapping = {c: normalizar_nombres_columnas(str(c)) for c in old_cols}
+        d2 = df.rename(columns=mapping)
         new_cols = list(d2.columns)
 
         if mostrar_cambios and old_cols != new_cols:
@@ -131,10 +272,34 @@ def normalizar_columnas_df_list(df_list, mostrar_cambios=True):
 
 
 
+# Caché LRU de resúmenes: en un notebook la misma columna se consulta muchas
+# veces seguidas y no hace falta recalcular el value_counts cada vez.
+# Cada entrada guarda (weakref al df, resumen): el weakref expulsa la entrada
+# en cuanto el DataFrame muere, de forma que un frame nuevo que reutilice la
+# misma dirección de memoria no pueda heredar un resumen ajeno. Las
+# mutaciones in-place no cambian id/filas/dtype, así que las funciones del
+# módulo que modifican columnas llaman a _invalidar_cache_resumen.
+_CACHE_RESUMEN = OrderedDict()
+_CACHE_RESUMEN_MAX = 128
+
+
+def _invalidar_cache_resumen(df, columna):
+    """
+    Expulsa de la caché los resúmenes de una columna que acaba de mutar.
+    """
+    claves = [k for k, (ref_df, _) in _CACHE_RESUMEN.items()
+              if ref_df() is df and k[1] == columna]
+    for clave in claves:
+        del _CACHE_RESUMEN[clave]
+
+
 def resumen_valores_columna(df, columna):
     """
     Devuelve un resumen con los valores únicos y el porcentaje de cada valor (incluyendo nulos) de una columna.
 
+    Los resultados se memorizan en una caché LRU acotada, de forma que
+    llamadas repetidas sobre el mismo DataFrame y columna no recalculan nada.
+
     Parámetros:
     - df: DataFrame de entrada
     - columna: nombre de la columna a analizar (str)
@@ -144,9 +309,51 @@ def resumen_valores_columna(df, columna):
     """
     total = df[columna].shape[0]
 
-    cont = df[columna].value_counts(dropna=False).reset_index()
-    cont.columns = [columna, 'Cantidad']
-    cont['%'] = round((cont['Cantidad'] / total) * 100, 2)
+    clave = (id(df), columna, total, str(df[columna].dtype))
+    entrada = _CACHE_RESUMEN.get(clave)
+    if entrada is not None:
+        ref_df, resumen = entrada
+        if ref_df() is df:
+            _CACHE_RESUMEN.move_to_end(clave)
+            return resumen.copy()  # que editar el resultado no corrompa la caché
+        # la dirección se reutilizó para otro DataFrame: descartar la entrada
+        del _CACHE_RESUMEN[clave]
+
+    serie = df[columna]
+    cont = None
+
+    if pd.api.types.is_integer_dtype(serie.dtype) and total > 0 and not serie.hasnans:
+        # Columnas enteras de rango acotado (cantidades, unidades...):
+        # un histograma denso con np.bincount evita el hashmap de value_counts
+        valores = serie.to_numpy(dtype='int64')
+        minimo = int(valores.min())
+        if int(valores.max()) - minimo < 1_000_000:
+            conteos = np.bincount(valores - minimo)
+            presentes = np.flatnonzero(conteos)
+            cont = pd.DataFrame({columna: presentes + minimo, 'Cantidad': conteos[presentes]})
+            cont = cont.sort_values('Cantidad', ascending=False, ignore_index=True)
+
+    if cont is None:
+        if 0 < total < 10_000 and not serie.hasnans:
+            # En columnas pequeñas Counter es bastante más rápido que value_counts
+            # (evita el factorize/sort interno de pandas). Solo sin nulos: cada
+            # NaN flotante sería una clave distinta y no se agregarían
+            conteos = Counter(serie.to_numpy())
+            cont = pd.DataFrame(conteos.items(), columns=[columna, 'Cantidad'])
+            cont = cont.sort_values('Cantidad', ascending=False, ignore_index=True)
+        else:
+            cont = serie.value_counts(dropna=False).rename_axis(columna).reset_index(name='Cantidad')
+
+    if total:
+        cont['%'] = (cont['Cantidad'] * (100 / total)).round(2)
+    else:
+        cont['%'] = cont['Cantidad']  # columna vacía: resumen vacío, sin dividir por cero
+
+    # el callback del weakref expulsa la entrada cuando el DataFrame muere
+    ref_df = weakref.ref(df, lambda _, clave=clave: _CACHE_RESUMEN.pop(clave, None))
+    _CACHE_RESUMEN[clave] = (ref_df, cont.copy())
+    if len(_CACHE_RESUMEN) > _CACHE_RESUMEN_MAX:
+        _CACHE_RESUMEN.popitem(last=False)  # expulsar el menos usado
 
     return cont
 
@@ -160,18 +367,27 @@ def mostrar_todos_valores_columna(df, columna, max_filas=None):
     - df: DataFrame de entrada.
     - columna: str, nombre de la columna a resumir.
     - funcion_resumen: función que recibe (df, columna) y devuelve un DataFrame resumen.
-    - max_filas: int o None, máximo de filas a mostrar (None para mostrar todas).
+    - max_filas: int o None, máximo de filas a mostrar (None aplica un tope
+      de 1000 para no congelar el notebook con columnas de alta cardinalidad).
 
     Ejemplo de uso:
         mostrar_resumen_columna(df, 'Cliente')
         mostrar_resumen_columna(df_2, "Cliente", max_filas=50)
     """
-    if max_filas is None:
-        with pd.option_context('display.max_rows', None):
-            display(resumen_valores_columna(df, columna))
-    else:
-        with pd.option_context('display.max_rows', max_filas):
-            display(resumen_valores_columna(df, columna))
+    # Calculamos el resumen una sola vez; max_filas solo afecta a la visualización
+    resumen = resumen_valores_columna(df, columna)
+
+    # Tope de filas a renderizar: una columna con millones de valores únicos
+    # (SKUs...) generaría un HTML enorme capaz de congelar el navegador
+    n = len(resumen)
+    tope = max_filas if max_filas is not None else 1000
+
+    if n > tope:
+        print(f"[INFO] Mostrando los {tope} valores más frecuentes de {n} únicos en '{columna}'")
+        resumen = resumen.head(tope)
+
+    with pd.option_context('display.max_rows', tope):
+        display(resumen)
 
 
 
@@ -180,9 +396,12 @@ def nulos_df (df, ordenar_desc=False):
     Devuelve un Dataframe con las columnas y el porcentaje de nulos de cada columna.
     """
 
+    # Calculamos la máscara de nulos una sola vez y la reutilizamos
+    nulos = df.isnull().sum()
+
     df_nulos = pd.DataFrame({
-        'Nulos': df.isnull().sum(),
-        '% Nulos': round(((df.isnull().sum() / len(df) ) *100),2)
+        'Nulos': nulos,
+        '% Nulos': ((nulos / len(df)) * 100).round(2)
     })
 
     if ordenar_desc:
@@ -209,14 +428,17 @@ def resumen_df(df):
     Returns:
         pd.DataFrame: DataFrame con el resumen de cada columna
     """
+    # Cada estadístico se calcula una sola vez sobre el DataFrame completo
+    # (vectorizado en C) en lugar de columna a columna en Python.
+    unicos = df.nunique(dropna=False)
+
     return pd.DataFrame({
         'Columna': df.columns,
-        'Tipo': [str(df[col].dtype) for col in df.columns],
-        'Total_Valores': [len(df[col]) for col in df.columns],
-        'Valores_Unicos': [df[col].nunique() for col in df.columns],
-        '%_Nulos': [round((df[col].isnull().sum() / len(df)) * 100, 2) 
-                    for col in df.columns],
-        'Duplicados': [df[col].duplicated().sum() for col in df.columns]
+        'Tipo': df.dtypes.astype(str).values,
+        'Total_Valores': len(df),
+        'Valores_Unicos': unicos.values,
+        '%_Nulos': (df.isnull().mean() * 100).round(2).values,
+        'Duplicados': (len(df) - unicos).values
     })
 
 
@@ -235,16 +457,27 @@ def convertir_columnas_datetime(df, columnas, formato="%d/%m/%Y"):
     """
     for col in columnas:
         try:
-            df[col] = pd.to_datetime(df[col], format=formato, errors='coerce')
-
-            errores = df[col].isna().sum()
-            convertidos = df[col].notna().sum()
-
-            total = len(df[col])
-            porcentaje_convertidos = round((convertidos / total) * 100, 2)
+            serie = df[col]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                # Las fechas suelen llegar como category desde compactar_columnas_texto;
+                # to_datetime sobre category devolvería category de Timestamps
+                # (sin orden), no datetime64
+                serie = serie.astype(object)
+
+            # cache=True deduplica el parseo en columnas con pocas fechas distintas
+            parsed = pd.to_datetime(serie, format=formato, errors='coerce', cache=True)
+            df[col] = parsed
+            _invalidar_cache_resumen(df, col)
+
+            total = len(parsed)
+            errores = parsed.isna().sum()
+            convertidos = total - errores  # una sola pasada sobre la columna
+            pct = 100 / total
+
+            porcentaje_convertidos = round(convertidos * pct, 2)
             print(f"En '{col}' hay {convertidos} valores convertidos ({porcentaje_convertidos}%).")
 
-            porcentaje_errores = round((errores / total) * 100, 2)
+            porcentaje_errores = round(errores * pct, 2)
             print(f"En '{col}' hay {errores} valores no convertidos ({porcentaje_errores}%).")
 
         except Exception as e:
@@ -254,6 +487,10 @@ def convertir_columnas_datetime(df, columnas, formato="%d/%m/%Y"):
 
 
 
+# Valores que se interpretan como True, construidos una sola vez
+_VALORES_TRUE = pa.array(['si', 'sí'])
+
+
 def convertir_columna_bool(df, columna):
     """
     Reemplaza en df[columna] los valores 'si'/'sí' por True y 'no' por False,
@@ -272,23 +509,33 @@ def convertir_columna_bool(df, columna):
         print(f"La columna '{columna}' no existe en el DataFrame.")
         return
 
-    # Normalizar a minúsculas y quitar espacios al inicio y fin
-    df[columna] = df[columna].astype(str).str.strip().str.lower()
+    # Normalizar (strip + minúsculas) y comparar con kernels de pyarrow,
+    # sin las cuatro Series intermedias de astype/strip/lower/map
+    serie = df[columna]
+    if not isinstance(serie.dtype, pd.StringDtype):
+        # solo materializamos la copia str si la columna no es ya de texto
+        serie = serie.astype(str)
+    arr = pa.array(serie, type=pa.string())
+    norm = pc.utf8_lower(pc.utf8_trim_whitespace(arr))
 
-    # Mapear los valores a booleanos
-    df[columna] = df[columna].map({
-        'si': True,
-        'sí': True,
-        'no': False
-    })
+    es_true = pc.is_in(norm, value_set=_VALORES_TRUE).to_numpy(zero_copy_only=False)
+    es_false = pc.equal(norm, 'no').to_numpy(zero_copy_only=False)
 
-    # Convertir el tipo de la columna a bool
-    df[columna] = df[columna].astype('boolean') # usamos .astype('boolean') en vez de .astype(bool) porque .astype('boolean') permite mantener los nulos (con <NA>) sin convertilos a False automáticamente  
+    # Todo lo que no sea si/sí/no queda como <NA>
+    valores = np.where(es_true, True, np.where(es_false, False, None))
+    df[columna] = pd.array(valores, dtype='boolean') # usamos dtype 'boolean' en vez de bool porque permite mantener los nulos (con <NA>) sin convertirlos a False automáticamente
+    _invalidar_cache_resumen(df, columna)
 
     print(f"Columna '{columna}' convertida a booleano.")
 
     
 
+# Patrones de limpieza, definidos una vez a nivel de módulo para que las
+# llamadas repetidas por columna no paguen su reconstrucción
+_PATRON_ESPACIOS = r'\s+'
+_PATRON_COMBINANTES = r'[\x{0300}-\x{036f}]'  # marcas combinantes tras NFKD
+
+
 def limpiar_columna_texto(df, nombre_col, col_no_cambiar=None) :
     """
     Limpia y normaliza in-place una columna de texto en un DataFrame,
@@ -319,30 +566,38 @@ def limpiar_columna_texto(df, nombre_col, col_no_cambiar=None) :
 
     if nombre_col in col_no_cambiar:
 
-        # Guardamos copia para comparar después
-        valor_original = df[nombre_col].astype(str).copy()
+        # Guardamos el array original para comparar después; si la columna ya
+        # es de texto, evitamos la copia de astype(str)
+        serie = df[nombre_col]
+        if not isinstance(serie.dtype, pd.StringDtype):
+            serie = serie.astype(str)
+        valor_original = pa.array(serie, type=pa.string())
 
-        valor_modificado = df[nombre_col].astype(str)
+        # Todo el pipeline de limpieza se hace con kernels de pyarrow (en C),
+        # sin callbacks de Python por celda
         # 1) strip
-        valor_modificado = valor_modificado.str.strip()
+        arr = pc.utf8_trim_whitespace(valor_original)
         # 2) colapsar espacios
-        valor_modificado = valor_modificado.str.replace(r'\s+', ' ', regex=True)
+        arr = pc.replace_substring_regex(arr, _PATRON_ESPACIOS, ' ')
         # 3) quitar puntos
-        servalor_modificadoie = valor_modificado.str.replace('.', '', regex=False)
+        arr = pc.replace_substring(arr, '.', '')
         # 4) normalizar Unicode → ASCII
-        valor_modificado = valor_modificado.map(lambda s: unicodedata.normalize('NFKD', s))
-        valor_modificado = valor_modificado.str.encode('ascii', errors='ignore').str.decode('utf-8')
-        # 5) Title
-        valor_modificado = valor_modificado.str.title()
-        # 6) Denominaciones sociales en mayúsculas
-        valor_modificado = valor_modificado.str.capitalize()
+        arr = pc.utf8_normalize(arr, form='NFKD')
+        # Tras NFKD los acentos quedan como marcas combinantes sueltas;
+        # quitarlas sustituye al antiguo encode('ascii')/decode y sus dos
+        # arrays intermedios
+        arr = pc.replace_substring_regex(arr, _PATRON_COMBINANTES, '')
+        # 5) Primera letra en mayúscula
+        arr = pc.utf8_capitalize(arr)
+        valor_modificado = pd.Series(arr.to_pandas().values, index=df.index)
 
         # Sobrescribimos en el DataFrame
         df[nombre_col] = valor_modificado
+        _invalidar_cache_resumen(df, nombre_col)
 
-    # Contamos cuántos han cambiado
-    # (se compara string a string)
-    diffs = (valor_original != valor_modificado).sum()
+    # Contamos cuántos han cambiado con el kernel de desigualdad de Arrow
+    # (se compara string a string, sin pasar por el camino object de pandas)
+    diffs = pc.sum(pc.not_equal(valor_original, arr)).as_py() or 0
     print(f"{diffs} valores actualizados en la columna '{nombre_col}'")
 
 